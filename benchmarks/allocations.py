@@ -0,0 +1,163 @@
+"""
+Memory and allocation benchmark of the objects built on every request:
+the view (with `TabsMixin` and `ModalMixin`), its `Location` objects,
+`UrlView` objects, `Tabs`, `Tabs.Link` and `Modal` objects.
+
+    python benchmarks/allocations.py [--baseline] [requests]
+
+With `--baseline` it measures the same objects built the way they were before
+`__slots__` and `ViewBound`: dict-backed, and with a `TabsView` and a `ModalView`
+class created in every view's `__init__`, for a before/after comparison on the
+same tree.
+"""
+import sys
+import timeit
+import tracemalloc
+from urllib.parse import urlparse, parse_qsl
+
+import django
+from django.conf import settings
+from django.utils.text import slugify
+
+settings.configure(INSTALLED_APPS=['django.contrib.contenttypes', 'django.contrib.auth'])
+django.setup()
+
+from django_htmx_ui.utils import Location, UrlView
+from django_htmx_ui.views.generic import PublicTemplateView
+from django_htmx_ui.views.mixins import TabsMixin, ModalMixin
+
+
+class View(TabsMixin, ModalMixin, PublicTemplateView):
+    slug_global = 'module_view'
+
+
+def request_objects():
+    view = View()
+    location_bar = Location.create_from_url('/module/view/?page=2&sort=name')
+    location_req = Location.create_from_url('/module/view/first/?page=2')
+    tabs = view.Tabs(
+        view.Tabs.Link('First', UrlView('app:module:first')),
+        view.Tabs.Link('Second', UrlView('app:module:second')),
+        view.Tabs.Link('Third', UrlView('app:module:third')),
+    )
+    modal = view.Modal(url=UrlView('app:module:create'))
+    return view, location_bar, location_req, tabs, modal
+
+
+class BaselineQuery:
+
+    def __init__(self, query_list, url):
+        self.query_list = query_list
+        self.url = url
+
+
+class BaselineLocation:
+
+    def __init__(self, path, query_list, push=False):
+        self.push = push
+        self.path = path
+        self.query = BaselineQuery(query_list, self)
+
+    @classmethod
+    def create_from_url(cls, location_url):
+        parsed_url = urlparse(location_url)
+        return cls(parsed_url.path, parse_qsl(parsed_url.query))
+
+
+class BaselineUrlView:
+
+    def __init__(self, view_ref, *args, **kwargs):
+        self.view_ref = view_ref
+        self.args = args
+        self.kwargs = kwargs
+
+
+class BaselineTabs:
+
+    class Link:
+        index = None
+
+        def __init__(self, title, url, slug=None, icon=None):
+            self.title = title
+            self.url = url
+            self._slug = slug
+            self.icon = icon
+
+        @property
+        def slug(self):
+            return self._slug or str(self.index)
+
+    def __init__(self, *links, selected=0, remember=False, titles_slugify=True):
+        self.selected = selected
+        self.remember = remember
+        self.links = links
+
+        for i, l in enumerate(self.links):
+            l.index = i
+            if titles_slugify and l._slug is None:
+                l._slug = slugify(l.title).replace('-', '_') or None
+                if l._slug in [ls.slug for ls in self.links if ls.index != l.index]:
+                    l._slug = None
+
+
+class BaselineModal:
+
+    def __init__(self, url, _id=None):
+        self.url = url
+        self.id = _id or f'modal_{self.view.slug_global}'
+
+
+class BaselineView(View):
+
+    def __init__(self, *args, **kwargs):
+        class TabsView(BaselineTabs):
+            view = self
+        self.Tabs = TabsView
+
+        class ModalView(BaselineModal):
+            view = self
+        self.Modal = ModalView
+        super().__init__(*args, **kwargs)
+
+
+def baseline_request_objects():
+    view = BaselineView()
+    location_bar = BaselineLocation.create_from_url('/module/view/?page=2&sort=name')
+    location_req = BaselineLocation.create_from_url('/module/view/first/?page=2')
+    tabs = view.Tabs(
+        view.Tabs.Link('First', BaselineUrlView('app:module:first')),
+        view.Tabs.Link('Second', BaselineUrlView('app:module:second')),
+        view.Tabs.Link('Third', BaselineUrlView('app:module:third')),
+    )
+    modal = view.Modal(url=BaselineUrlView('app:module:create'))
+    return view, location_bar, location_req, tabs, modal
+
+
+def main(requests=10000, baseline=False):
+    build = baseline_request_objects if baseline else request_objects
+    build()
+
+    tracemalloc.start()
+    start = tracemalloc.take_snapshot()
+    kept = [build() for _ in range(requests)]
+    end = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    stats = end.compare_to(start, 'filename')
+    size = sum(stat.size_diff for stat in stats)
+    blocks = sum(stat.count_diff for stat in stats)
+    del kept
+
+    seconds = min(timeit.repeat(build, number=requests, repeat=5))
+
+    print(f'objects:               {"baseline" if baseline else "current"}')
+    print(f'requests:              {requests}')
+    print(f'bytes per request:     {size / requests:.0f}')
+    print(f'blocks per request:    {blocks / requests:.1f}')
+    print(f'microseconds/request:  {seconds / requests * 1e6:.2f}')
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    baseline = '--baseline' in args
+    main(*(int(arg) for arg in args if arg != '--baseline'), baseline=baseline)
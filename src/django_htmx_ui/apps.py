@@ -1,6 +1,23 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.db.models.signals import post_migrate
+
+
+def setup_search(sender, **kwargs):
+    from django_htmx_ui.search import setup_search
+    setup_search()
 
 
 class DjangoHtmxUiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'django_htmx_ui'
+
+    def ready(self):
+        from django_htmx_ui.search import register_search
+
+        # Every process keeps the search indexes up to date from its first write,
+        # not from its first search. The tables and indexes are created after
+        # `migrate`, instead of during a request.
+        if getattr(settings, 'ROOT_URLCONF', None):
+            register_search()
+        post_migrate.connect(setup_search, sender=self)
@@ -1,24 +1,181 @@
-from functools import cached_property
+import re
+import threading
+import weakref
+from collections import OrderedDict
+from functools import cached_property, partial, update_wrapper
+from urllib.parse import quote
 
 import django.forms.renderers
 from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
 from django.templatetags.static import static
-from django.urls import reverse
+from django.urls import reverse, resolve, get_resolver, get_script_prefix, get_urlconf, NoReverseMatch, Resolver404, \
+    URLResolver
+from django.urls.converters import DEFAULT_CONVERTERS
 from django.utils import timezone
+from django.utils.http import RFC3986_SUBDELIMS
 from django_htmx.jinja import django_htmx_script
-from django.utils.translation import gettext, ngettext
+from django.utils.translation import gettext, ngettext, get_language
 import humanize
 
 from jinja2 import Environment
 
 
+URL_MARKER = '918273645546372819'
+ROUTE_CONVERTER = re.compile(r'<(?:(?P<converter>[^>:]+):)?(?P<name>[^>]+)>')
+
+
+class Memoized:
+    instances = weakref.WeakSet()
+    clear_on_settings = (
+        'ROOT_URLCONF',
+        'FORCE_SCRIPT_NAME',
+        'STATIC_URL',
+        'STATICFILES_STORAGE',
+        'STORAGES',
+    )
+
+    def __init__(self, func, maxsize=1024):
+        update_wrapper(self, func)
+        self.func = func
+        self.maxsize = maxsize
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+        Memoized.instances.add(self)
+
+    def __call__(self, *args, **kwargs):
+        # The active urlconf, script prefix and language are part of the key, so
+        # per-request `request.urlconf` overrides, mounted prefixes and
+        # `i18n_patterns` never share results.
+        key = (get_urlconf(), get_script_prefix(), get_language(), freeze(args), freeze(kwargs))
+        try:
+            hash(key)
+        except TypeError:
+            return self.func(*args, **kwargs)
+        with self.lock:
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                return self.cache[key]
+        value = self.func(*args, **kwargs)
+        with self.lock:
+            self.cache[key] = value
+            if len(self.cache) > self.maxsize:
+                self.cache.popitem(last=False)
+        return value
+
+    def cache_clear(self):
+        with self.lock:
+            self.cache.clear()
+
+
+@receiver(setting_changed)
+def clear_memoized(setting, **kwargs):
+    if setting in Memoized.clear_on_settings:
+        for memoized in list(Memoized.instances):
+            memoized.cache_clear()
+
+
+def freeze(value):
+    if isinstance(value, dict):
+        return tuple(sorted((k, freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+def url_rows(viewname, objects, field='pk', kwarg=None, args=None, kwargs=None, reverse=reverse):
+    args = list(args or [])
+    kwargs = dict(kwargs or {})
+    if kwarg:
+        kwargs[kwarg] = URL_MARKER
+    else:
+        args.append(URL_MARKER)
+
+    try:
+        template = reverse(viewname, args=args or None, kwargs=kwargs or None)
+    except NoReverseMatch:
+        template = ''
+
+    def reverse_row(value):
+        if kwarg:
+            return reverse(viewname, args=args or None, kwargs={**kwargs, kwarg: value})
+        else:
+            return reverse(viewname, args=args[:-1] + [value], kwargs=kwargs or None)
+
+    marker = None
+    if template.count(URL_MARKER) == 1 and default_converters(template):
+        marker = marker_pattern(template)
+
+    if marker is None:
+        # The route does not accept the marker (e.g. a uuid converter), or its
+        # converters may format values differently, so fall back to a full
+        # reverse for every object.
+        for obj in objects:
+            yield obj, reverse_row(getattr(obj, field))
+        return
+
+    pattern, segment, rest, key = marker
+    prefix, suffix = template.split(URL_MARKER)
+    safe = RFC3986_SUBDELIMS + '/~:@'
+    for obj in objects:
+        value = getattr(obj, field)
+        text = str(value)
+        # Only the part of the path the marker's pattern matched is checked, so a
+        # value the route doesn't accept is left to `reverse`, which rejects it.
+        match = pattern.match(segment.replace(URL_MARKER, text))
+        if match is not None and match[0] == rest and str(match[2 if isinstance(key, str) else 1][key]) == text:
+            yield obj, prefix + quote(text, safe=safe) + suffix
+        else:
+            yield obj, reverse_row(value)
+
+
+def marker_pattern(path):
+    # Walks the urlconf as `resolve` does, down to the pattern that captures the
+    # marker, and returns it with the part of the path it matched.
+    def walk(patterns, path):
+        for url_pattern in patterns:
+            match = url_pattern.pattern.match(path)
+            if match is None:
+                continue
+            rest, args, kwargs = match
+            for key, value in [*enumerate(args), *kwargs.items()]:
+                if value == URL_MARKER:
+                    return url_pattern.pattern, path, rest, key
+            if isinstance(url_pattern, URLResolver):
+                found = walk(url_pattern.url_patterns, rest)
+                if found:
+                    return found
+
+    resolver = get_resolver(get_urlconf())
+    match = resolver.pattern.match('/' + path.removeprefix(get_script_prefix()))
+    return walk(resolver.url_patterns, match[0]) if match else None
+
+
+def default_converters(path):
+    script_prefix = get_script_prefix()
+    try:
+        route = resolve('/' + path.removeprefix(script_prefix)).route
+    except Resolver404:
+        return False
+    return all(
+        match['converter'] is None or match['converter'] in DEFAULT_CONVERTERS
+        for match in ROUTE_CONVERTER.finditer(route)
+    )
+
+
 def environment(**options):
+    url_cache_size = options.pop('url_cache_size', 1024)
+    options.setdefault('auto_reload', settings.DEBUG)
+    options.setdefault('cache_size', 400)
     options.update({'extensions':['jinja2.ext.i18n']})
     env = Environment(**options)
     env.install_gettext_callables(gettext=gettext, ngettext=ngettext, newstyle=True)
+    cached_reverse = Memoized(reverse, url_cache_size)
     env.globals.update({
-        'static': static,
-        'url': reverse,
+        'static': Memoized(static, url_cache_size),
+        'url': cached_reverse,
+        'url_rows': partial(url_rows, reverse=cached_reverse),
         'humanize': humanize,
         'now': timezone.now,
         'django_htmx_script': django_htmx_script,
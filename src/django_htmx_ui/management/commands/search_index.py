@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from django_htmx_ui.search import search_views, setup_search
+
+
+class Command(BaseCommand):
+    help = 'Creates or rebuilds the search indexes of the views with a `search_backend`.'
+
+    def handle(self, *args, **options):
+        setup_search()
+        for view in search_views():
+            self.stdout.write(f'{view.__module__}.{view.__qualname__}: {view.module.MODEL._meta.label}')
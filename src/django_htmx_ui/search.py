@@ -0,0 +1,270 @@
+import hashlib
+import threading
+from functools import reduce
+from operator import or_
+
+from django.db import connections, router
+from django.db.backends.utils import truncate_name
+from django.db.models import IntegerField, Q
+from django.db.models.expressions import RawSQL
+from django.db.models.signals import post_save, post_delete
+from django.urls import URLResolver, get_resolver
+
+
+class SearchBackend:
+
+    def __init__(self):
+        self.registry = {}
+
+    def register(self, model, fields):
+        fields = tuple(fields)
+        if self.registry.get(model) == fields:
+            return
+        self.registry[model] = fields
+        uid = f'django_htmx_ui.search.{id(self)}.{model._meta.label}'
+        post_save.connect(self.on_save, sender=model, weak=False, dispatch_uid=uid)
+        post_delete.connect(self.on_delete, sender=model, weak=False, dispatch_uid=uid)
+
+    def setup(self, model):
+        pass
+
+    def on_save(self, sender, instance, **kwargs):
+        self.index(instance)
+
+    def on_delete(self, sender, instance, **kwargs):
+        self.remove(sender, instance.pk)
+
+    def index(self, instance):
+        pass
+
+    def remove(self, model, pk):
+        pass
+
+    def search(self, queryset, query):
+        raise NotImplementedError()
+
+
+class FullTextSearchBackend(SearchBackend):
+    """
+    SQLite FTS5 table per model, updated from the model signals, or PostgreSQL
+    full text search over a GIN expression index. Other databases fall back to
+    `icontains` filters.
+    """
+    search_config = 'simple'
+
+    def connection(self, model):
+        return connections[router.db_for_write(model)]
+
+    def table(self, model):
+        return f'{model._meta.db_table}_fts'
+
+    def fts(self, model):
+        # The FTS5 rows are keyed by rowid, so only integer primary keys fit.
+        pk = model._meta.pk
+        while pk.is_relation:
+            pk = pk.target_field
+        return self.connection(model).vendor == 'sqlite' and isinstance(pk, IntegerField)
+
+    def document(self, connection, model):
+        # The same expression builds the PostgreSQL index and the query, so that
+        # the planner uses the index.
+        columns = [connection.ops.quote_name(model._meta.get_field(field).column) for field in self.registry[model]]
+        text = " || ' ' || ".join(f"coalesce({column}::text, '')" for column in columns)
+        return f"to_tsvector('{self.search_config}'::regconfig, {text})"
+
+    def setup_postgresql(self, connection, model):
+        table = model._meta.db_table
+        prefix = truncate_name(table, connection.ops.max_name_length() - 16) + '_search_'
+        digest = hashlib.md5(self.document(connection, model).encode(), usedforsecurity=False).hexdigest()[:8]
+        name = prefix + digest
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT indexname FROM pg_indexes WHERE tablename = %s', [table])
+            existing = {row[0] for row in cursor.fetchall() if row[0].startswith(prefix)}
+            if name in existing:
+                return
+            for index in existing:
+                cursor.execute(f'DROP INDEX {connection.ops.quote_name(index)}')
+            cursor.execute('CREATE INDEX %s ON %s USING GIN (%s)' % (
+                connection.ops.quote_name(name), connection.ops.quote_name(table), self.document(connection, model),
+            ))
+
+    def setup(self, model):
+        connection = self.connection(model)
+        if connection.vendor == 'postgresql':
+            return self.setup_postgresql(connection, model)
+        if not self.fts(model):
+            return
+        fields = list(self.registry[model])
+        table = connection.ops.quote_name(self.table(model))
+        with connection.cursor() as cursor:
+            if self.table(model) in connection.introspection.table_names(cursor):
+                cursor.execute(f'PRAGMA table_info({table})')
+                if [row[1] for row in cursor.fetchall()] == fields:
+                    return
+                cursor.execute(f'DROP TABLE {table}')
+            cursor.execute('CREATE VIRTUAL TABLE %s USING fts5(%s)' % (
+                table, ', '.join(connection.ops.quote_name(field) for field in fields),
+            ))
+        self.rebuild(model)
+
+    def rebuild(self, model):
+        connection = self.connection(model)
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM %s' % connection.ops.quote_name(self.table(model)))
+        for instance in model._default_manager.using(connection.alias).iterator():
+            self.index(instance)
+
+    def index(self, instance):
+        model = instance.__class__
+        if not self.fts(model):
+            return
+        connection = self.connection(model)
+        fields = self.registry[model]
+        table = connection.ops.quote_name(self.table(model))
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {table} WHERE rowid = %s', [instance.pk])
+            cursor.execute(
+                'INSERT INTO %s (rowid, %s) VALUES (%s)' % (
+                    table,
+                    ', '.join(connection.ops.quote_name(field) for field in fields),
+                    ', '.join(['%s'] * (len(fields) + 1)),
+                ),
+                [instance.pk] + [str(getattr(instance, field) or '') for field in fields],
+            )
+
+    def remove(self, model, pk):
+        if not self.fts(model):
+            return
+        connection = self.connection(model)
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {connection.ops.quote_name(self.table(model))} WHERE rowid = %s', [pk])
+
+    def search(self, queryset, query):
+        model = queryset.model
+        fields = self.registry[model]
+        connection = self.connection(model)
+
+        if self.fts(model):
+            table = connection.ops.quote_name(self.table(model))
+            # Every word is quoted and matched as a prefix, for search-as-you-type.
+            match = ' '.join('"%s"*' % word.replace('"', '""') for word in query.split())
+            return queryset.filter(pk__in=RawSQL(f'SELECT rowid FROM {table} WHERE {table} MATCH %s', [match]))
+
+        if connection.vendor == 'postgresql':
+            table = connection.ops.quote_name(model._meta.db_table)
+            pk = connection.ops.quote_name(model._meta.pk.column)
+            return queryset.filter(pk__in=RawSQL(
+                f"SELECT {pk} FROM {table} WHERE {self.document(connection, model)} "
+                f"@@ websearch_to_tsquery('{self.search_config}'::regconfig, %s)",
+                [query],
+            ))
+
+        return queryset.filter(reduce(or_, (Q(**{f'{field}__icontains': query}) for field in fields)))
+
+
+class TrigramSearchBackend(SearchBackend):
+    """
+    In-memory trigram index, built on the first search and kept up to date from
+    the model signals. Suitable for small models.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.lock = threading.Lock()
+        self.trigrams = {}
+        self.documents = {}
+
+    @staticmethod
+    def text_trigrams(text):
+        trigrams = set()
+        for word in text.lower().split():
+            word = f'  {word} '
+            trigrams.update(word[i:i + 3] for i in range(len(word) - 2))
+        return trigrams
+
+    @staticmethod
+    def query_trigrams(query):
+        trigrams = set()
+        for word in query.lower().split():
+            if len(word) < 3:
+                trigrams.add(f'  {word}'[-3:])
+            else:
+                trigrams.update(word[i:i + 3] for i in range(len(word) - 2))
+        return trigrams
+
+    def build(self, model):
+        trigrams, documents = {}, {}
+        fields = self.registry[model]
+        for pk, *values in model._default_manager.values_list('pk', *fields).iterator():
+            documents[pk] = self.text_trigrams(' '.join(str(value or '') for value in values))
+            for trigram in documents[pk]:
+                trigrams.setdefault(trigram, set()).add(pk)
+        with self.lock:
+            self.trigrams[model], self.documents[model] = trigrams, documents
+
+    def index(self, instance):
+        model = instance.__class__
+        if model not in self.documents:
+            return
+        text = ' '.join(str(getattr(instance, field) or '') for field in self.registry[model])
+        self.remove(model, instance.pk)
+        with self.lock:
+            self.documents[model][instance.pk] = self.text_trigrams(text)
+            for trigram in self.documents[model][instance.pk]:
+                self.trigrams[model].setdefault(trigram, set()).add(instance.pk)
+
+    def remove(self, model, pk):
+        if model not in self.documents:
+            return
+        with self.lock:
+            for trigram in self.documents[model].pop(pk, ()):
+                pks = self.trigrams[model][trigram]
+                pks.discard(pk)
+                if not pks:
+                    del self.trigrams[model][trigram]
+
+    def search(self, queryset, query):
+        model = queryset.model
+        if model not in self.documents:
+            self.build(model)
+        with self.lock:
+            postings = [self.trigrams[model].get(trigram, set()) for trigram in self.query_trigrams(query)]
+            pks = set.intersection(*postings) if postings else set()
+        # Each pk is a query parameter, so broad queries that would exceed the
+        # database's limit (leaving room for the other filters) are searched there.
+        limit = connections[queryset.db].features.max_query_params
+        if limit and len(pks) > limit // 2:
+            return queryset.filter(*(
+                reduce(or_, (Q(**{f'{field}__icontains': word}) for field in self.registry[model]))
+                for word in query.split()
+            ))
+        return queryset.filter(pk__in=pks)
+
+
+def search_views(resolver=None):
+    for pattern in (resolver or get_resolver()).url_patterns:
+        if isinstance(pattern, URLResolver):
+            yield from search_views(pattern)
+        else:
+            view = getattr(pattern.callback, 'view_class', None)
+            if getattr(view, 'search_backend', None) is not None:
+                yield view
+
+
+def register_search():
+    """
+    Registers the models of the views with a `search_backend`, which connects
+    the signals that keep their indexes up to date.
+    """
+    for view in search_views():
+        view.search_backend.register(view.module.MODEL, view.search_fields)
+
+
+def setup_search():
+    """
+    Registers the models of the views with a `search_backend`, and creates or
+    rebuilds their indexes where it is needed.
+    """
+    register_search()
+    for view in search_views():
+        view.search_backend.setup(view.module.MODEL)
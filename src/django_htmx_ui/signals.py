@@ -0,0 +1,6 @@
+from django.dispatch import Signal
+
+
+# Sent once a change of a model instance is committed, with the model as the
+# sender and the instance's `pk`.
+model_changed = Signal()
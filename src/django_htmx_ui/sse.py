@@ -0,0 +1,88 @@
+import asyncio
+import threading
+from contextlib import aclosing
+from urllib.parse import urlencode
+
+from django.urls import reverse
+from django.utils.html import format_html
+
+
+class Broker:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscribers = {}
+
+    def publish(self, event, data=''):
+        with self.lock:
+            subscribers = list(self.subscribers.get(event, ()))
+        for loop, queue in subscribers:
+            # Publishers usually run in the sync views thread, so the message is
+            # handed over to the subscriber's event loop.
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, (event, data))
+            except RuntimeError:
+                pass
+
+    async def subscribe(self, events, heartbeat=None):
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue())
+        with self.lock:
+            for event in events:
+                self.subscribers.setdefault(event, set()).add(subscriber)
+        try:
+            # A first empty message tells the caller it is already subscribed.
+            yield None
+            while True:
+                try:
+                    yield await asyncio.wait_for(subscriber[1].get(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            with self.lock:
+                for event in events:
+                    subscribers = self.subscribers.get(event, set())
+                    subscribers.discard(subscriber)
+                    if not subscribers:
+                        self.subscribers.pop(event, None)
+
+    async def stream(self, events, heartbeat=None):
+        # Closing the stream must close the subscription too, to unregister it.
+        async with aclosing(self.subscribe(events, heartbeat)) as messages:
+            async for message in messages:
+                if message is None:
+                    yield ': heartbeat\n\n'
+                else:
+                    yield format_event(*message)
+
+
+broker = Broker()
+
+
+def format_event(event, data=''):
+    lines = [f'event: {event}'] + [f'data: {line}' for line in str(data).splitlines() or ['']]
+    return '\n'.join(lines) + '\n\n'
+
+
+def model_event(model, pk=None):
+    event = model._meta.label_lower.replace('.', '_') + '_changed'
+    return event if pk is None else f'{event}_{pk}'
+
+
+class EventStream:
+
+    def __init__(self, events, url=None):
+        self.events = tuple(events)
+        self.url = url or reverse('django_htmx_ui:events')
+
+    @property
+    def connect(self):
+        return self.url + '?' + urlencode({'events': ','.join(self.events)})
+
+    def trigger(self, *events):
+        return ', '.join(f'sse:{event}' for event in events or self.events)
+
+    def __html__(self):
+        return format_html('hx-ext="sse" sse-connect="{}"', self.connect)
+
+    def __str__(self):
+        return self.__html__()
@@ -1,3 +1,251 @@
-from django.test import TestCase
+import asyncio
+import threading
+import time
 
-# Create your tests here.
+from django.test import SimpleTestCase, override_settings
+from django.utils import translation
+
+from django_htmx_ui.jinja import Memoized
+from django_htmx_ui.sse import Broker
+from django_htmx_ui.utils import SingleFlight, AsyncSingleFlight
+
+
+class SingleFlightTests(SimpleTestCase):
+
+    def test_waiters_share_the_leader_result(self):
+        flight = SingleFlight()
+        started, release = threading.Event(), threading.Event()
+        calls, results = [], []
+
+        def leader():
+            calls.append('leader')
+            started.set()
+            release.wait(5)
+            return 'shared'
+
+        thread = threading.Thread(target=lambda: results.append(flight.do('key', leader, 5)))
+        thread.start()
+        started.wait(5)
+        waiters = [
+            threading.Thread(target=lambda: results.append(flight.do('key', lambda: calls.append('waiter'), 5)))
+            for _ in range(3)
+        ]
+        for waiter in waiters:
+            waiter.start()
+        # Gives the waiters the time to join the flight.
+        time.sleep(0.1)
+        release.set()
+        for t in [thread, *waiters]:
+            t.join(5)
+
+        self.assertEqual(calls, ['leader'])
+        self.assertEqual(results, ['shared'] * 4)
+        self.assertEqual(flight.calls, {})
+
+    def test_leader_failure(self):
+        flight = SingleFlight()
+        started, release = threading.Event(), threading.Event()
+        results = []
+
+        def leader():
+            started.set()
+            release.wait(5)
+            raise RuntimeError()
+
+        def lead():
+            with self.assertRaises(RuntimeError):
+                flight.do('key', leader, 5)
+
+        thread = threading.Thread(target=lead)
+        thread.start()
+        started.wait(5)
+        waiter = threading.Thread(target=lambda: results.append(flight.do('key', lambda: 'own', 5)))
+        waiter.start()
+        time.sleep(0.1)
+        release.set()
+        thread.join(5)
+        waiter.join(5)
+
+        self.assertEqual(results, ['own'])
+        self.assertEqual(flight.calls, {})
+
+    def test_waiter_timeout(self):
+        flight = SingleFlight()
+        started, release = threading.Event(), threading.Event()
+
+        def leader():
+            started.set()
+            release.wait(5)
+            return 'late'
+
+        thread = threading.Thread(target=flight.do, args=('key', leader))
+        thread.start()
+        started.wait(5)
+        self.assertEqual(flight.do('key', lambda: 'own', 0.01), 'own')
+        release.set()
+        thread.join(5)
+        self.assertEqual(flight.calls, {})
+
+
+class AsyncSingleFlightTests(SimpleTestCase):
+
+    def test_waiters_share_the_leader_result(self):
+        flight = AsyncSingleFlight()
+        calls = []
+
+        async def leader():
+            calls.append('leader')
+            await asyncio.sleep(0.05)
+            return 'shared'
+
+        async def waiter():
+            calls.append('waiter')
+
+        async def main():
+            first = asyncio.create_task(flight.do('key', leader, 5))
+            await asyncio.sleep(0)
+            return await asyncio.gather(first, *(flight.do('key', waiter, 5) for _ in range(3)))
+
+        self.assertEqual(asyncio.run(main()), ['shared'] * 4)
+        self.assertEqual(calls, ['leader'])
+        self.assertEqual(flight.calls, {})
+
+    def test_leader_failure(self):
+        flight = AsyncSingleFlight()
+
+        async def leader():
+            await asyncio.sleep(0.05)
+            raise RuntimeError()
+
+        async def own():
+            return 'own'
+
+        async def main():
+            first = asyncio.create_task(flight.do('key', leader, 5))
+            await asyncio.sleep(0)
+            result = await flight.do('key', own, 5)
+            with self.assertRaises(RuntimeError):
+                await first
+            return result
+
+        self.assertEqual(asyncio.run(main()), 'own')
+        self.assertEqual(flight.calls, {})
+
+    def test_waiter_timeout(self):
+        flight = AsyncSingleFlight()
+
+        async def leader():
+            await asyncio.sleep(0.2)
+            return 'late'
+
+        async def own():
+            return 'own'
+
+        async def main():
+            first = asyncio.create_task(flight.do('key', leader, 5))
+            await asyncio.sleep(0)
+            result = await flight.do('key', own, 0.01)
+            return result, await first
+
+        self.assertEqual(asyncio.run(main()), ('own', 'late'))
+        self.assertEqual(flight.calls, {})
+
+
+class BrokerTests(SimpleTestCase):
+
+    def test_publish_and_cleanup(self):
+        broker = Broker()
+
+        async def main():
+            messages = broker.subscribe(['a', 'b'])
+            self.assertIsNone(await messages.__anext__())
+            broker.publish('a', 'data')
+            broker.publish('c', 'ignored')
+            message = await asyncio.wait_for(messages.__anext__(), 1)
+            await messages.aclose()
+            return message
+
+        self.assertEqual(asyncio.run(main()), ('a', 'data'))
+        self.assertEqual(broker.subscribers, {})
+
+    def test_publish_from_another_thread(self):
+        broker = Broker()
+
+        async def main():
+            messages = broker.subscribe(['a'])
+            await messages.__anext__()
+            await asyncio.get_running_loop().run_in_executor(None, broker.publish, 'a', 'data')
+            message = await asyncio.wait_for(messages.__anext__(), 1)
+            await messages.aclose()
+            return message
+
+        self.assertEqual(asyncio.run(main()), ('a', 'data'))
+        self.assertEqual(broker.subscribers, {})
+
+    def test_heartbeat(self):
+        broker = Broker()
+
+        async def main():
+            messages = broker.stream(['a'], heartbeat=0.01)
+            first, second = await messages.__anext__(), await asyncio.wait_for(messages.__anext__(), 1)
+            await messages.aclose()
+            return first, second
+
+        self.assertEqual(asyncio.run(main()), (': heartbeat\n\n', ': heartbeat\n\n'))
+        self.assertEqual(broker.subscribers, {})
+
+    def test_stream_close(self):
+        broker = Broker()
+
+        async def main():
+            messages = broker.stream(['a'])
+            await messages.__anext__()
+            self.assertIn('a', broker.subscribers)
+            await messages.aclose()
+
+        asyncio.run(main())
+        self.assertEqual(broker.subscribers, {})
+
+
+class MemoizedTests(SimpleTestCase):
+
+    def setUp(self):
+        self.calls = []
+
+        def func(*args, **kwargs):
+            self.calls.append((args, kwargs))
+            return (translation.get_language(), args, kwargs)
+
+        self.memoized = Memoized(func, maxsize=2)
+
+    def test_hit(self):
+        self.assertEqual(self.memoized('a', x=[1]), self.memoized('a', x=[1]))
+        self.assertEqual(len(self.calls), 1)
+
+    def test_eviction(self):
+        self.memoized('a')
+        self.memoized('b')
+        self.memoized('a')
+        self.memoized('c')
+        self.memoized('a')
+        self.assertEqual(len(self.calls), 3)
+        self.memoized('b')
+        self.assertEqual(len(self.calls), 4)
+
+    def test_language(self):
+        with translation.override('en'):
+            self.assertEqual(self.memoized('a')[0], 'en')
+        with translation.override('de'):
+            self.assertEqual(self.memoized('a')[0], 'de')
+        self.assertEqual(len(self.calls), 2)
+
+    def test_unhashable(self):
+        self.memoized({1, 2})
+        self.memoized({1, 2})
+        self.assertEqual(len(self.calls), 2)
+
+    def test_clear_on_settings(self):
+        self.memoized('a')
+        with override_settings(STATIC_URL='/other/'):
+            self.memoized('a')
+        self.assertEqual(len(self.calls), 2)
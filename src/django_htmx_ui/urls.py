@@ -0,0 +1,9 @@
+from django.urls import path
+
+from django_htmx_ui.views.generic import EventStreamView
+
+
+app_name = 'django_htmx_ui'
+urlpatterns = [
+    path('events/', EventStreamView.as_view(), name='events'),
+]
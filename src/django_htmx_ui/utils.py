@@ -1,11 +1,25 @@
+import asyncio
 import functools
+import gzip
+import hashlib
 import importlib
 import inspect
+import itertools
 import re
+import threading
+from collections import ChainMap
+from collections.abc import Mapping
 from urllib.parse import urlencode, urlparse, parse_qsl
 
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.template.backends.django import Template as DjangoTemplate
+from django.template.backends.utils import csrf_input_lazy, csrf_token_lazy
+from django.template.response import TemplateResponse
 from django.urls import path, include, reverse, resolve
 from django.shortcuts import redirect
+from django.utils.cache import patch_vary_headers
+from django.utils.html import format_html
 from django_htmx.http import HttpResponseClientRedirect
 
 
@@ -17,9 +31,88 @@ class ContextCachedProperty(functools.cached_property):
     pass
 
 
+class ContextDeferredProperty(ContextProperty):
+    trigger = 'load'
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner=None):
+        if instance is None or getattr(instance, 'deferred_section', None) == self.name:
+            return super().__get__(instance, owner)
+        return Deferred(instance, self.name, self.trigger)
+
+    @classmethod
+    def revealed(cls, fget):
+        prop = cls(fget)
+        prop.trigger = 'revealed'
+        return prop
+
+
+class Deferred:
+
+    def __init__(self, view, name, trigger):
+        self.view = view
+        self.name = name
+        self.trigger = trigger
+
+    @property
+    def url(self):
+        return self.view.deferred_url(self.name)
+
+    def __html__(self):
+        return format_html(
+            '<div hx-get="{}" hx-trigger="{}" hx-swap="outerHTML"></div>',
+            self.url,
+            self.trigger,
+        )
+
+    def __str__(self):
+        return self.__html__()
+
+
+@functools.cache
+def context_property_names(klass):
+    return dict.fromkeys(
+        name
+        for name, member in inspect.getmembers_static(
+            klass,
+            lambda o:
+                isinstance(o, (
+                    ContextProperty,
+                    ContextCachedProperty,
+                ))
+        )
+    )
+
+
+class ContextProperties(Mapping):
+
+    def __init__(self, view, names=None):
+        self.view = view
+        self.names = context_property_names(view.__class__) if names is None else dict.fromkeys(names)
+
+    def __getitem__(self, key):
+        if key not in self.names:
+            raise KeyError(key)
+        return getattr(self.view, key)
+
+    def __contains__(self, key):
+        # Jinja checks a key before reading it, which must not evaluate it twice.
+        return key in self.names
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __len__(self):
+        return len(self.names)
+
+
 class Url:
+    __slots__ = ('path', 'query')
 
     class Query:
+        __slots__ = ('query_list', 'url')
 
         def __init__(self, query_list, url):
             self.query_list = query_list
@@ -111,22 +204,25 @@ class Url:
 
 
 class UrlView:
+    __slots__ = ('view_ref', 'args', 'kwargs', '_cached_url')
 
     def __init__(self, view_ref, *args, **kwargs):
         self.view_ref = view_ref
         self.args = args
         self.kwargs = kwargs
+        self._cached_url = None
 
     def update(self, *args, **kwargs):
         self.args = args
         self.kwargs = kwargs
-        if hasattr(self, '_url'):
-            del self._url
+        self._cached_url = None
         return self
 
-    @functools.cached_property
+    @property
     def _url(self):
-        return Url.create(self.view_ref, *self.args, **self.kwargs)
+        if self._cached_url is None:
+            self._cached_url = Url.create(self.view_ref, *self.args, **self.kwargs)
+        return self._cached_url
 
     @property
     def path(self):
@@ -155,6 +251,7 @@ class UrlView:
 
 
 class Location(Url):
+    __slots__ = ('push',)
 
     def __init__(self, path, query_list, push=False):
         self.push = push
@@ -179,6 +276,263 @@ class Location(Url):
         return url
 
 
+class LazyCount:
+
+    def __init__(self, func):
+        self.func = func
+
+    @functools.cached_property
+    def result(self):
+        return self.func()
+
+    @property
+    def value(self):
+        return self.result[0]
+
+    @property
+    def display(self):
+        return self.result[1]
+
+    @property
+    def exact(self):
+        return self.result[2]
+
+    def __int__(self):
+        return self.value
+
+    def __bool__(self):
+        return bool(self.value)
+
+    def __str__(self):
+        return self.display
+
+
+def render_template(template, context, request=None):
+    if isinstance(context, dict):
+        return template.render(context, request)
+    if isinstance(template, DjangoTemplate):
+        # Django's templates require a plain dict.
+        return template.render(dict(context), request)
+
+    jinja_template = getattr(template, 'template', None)
+    if not hasattr(jinja_template, 'root_render_func') or jinja_template.environment.is_async:
+        return template.render(context, request)
+
+    # Jinja's own `render` copies the context into a dict, which evaluates every
+    # lazy value. A shared context reads the layers on access instead, and the
+    # engine's additions go in the first layer, as the django backend does.
+    if request is not None:
+        context['request'] = request
+        context['csrf_input'] = csrf_input_lazy(request)
+        context['csrf_token'] = csrf_token_lazy(request)
+        for context_processor in template.backend.template_context_processors:
+            context.update(context_processor(request))
+    jinja_context = jinja_template.new_context(ChainMap(*context.maps, jinja_template.globals), shared=True)
+    try:
+        return jinja_template.environment.concat(jinja_template.root_render_func(jinja_context))
+    except Exception:
+        return jinja_template.environment.handle_exception()
+
+
+class LayeredTemplateResponse(TemplateResponse):
+
+    @property
+    def rendered_content(self):
+        template = self.resolve_template(self.template_name)
+        return render_template(template, self.resolve_context(self.context_data), self._request)
+
+
+def csrf_secret(request):
+    # `get_token` flags the request when the rendered content embeds its csrf
+    # token, which only works together with the request's own csrf secret.
+    if request is not None and request.META.get('CSRF_COOKIE_NEEDS_UPDATE'):
+        return request.META.get('CSRF_COOKIE')
+
+
+class ResponseSnapshot:
+
+    def __init__(self, response, private_headers=(), request=None):
+        private_headers = {h.lower() for h in private_headers}
+        self.csrf = csrf_secret(request)
+        self.status_code = response.status_code
+        self.content = response.content
+        self.headers = [
+            (key, value)
+            for key, value in response.headers.items()
+            if key.lower() not in private_headers
+        ]
+
+    def response(self):
+        response = HttpResponse(self.content, status=self.status_code)
+        for key, value in self.headers:
+            response[key] = value
+        return response
+
+    def shareable(self, request):
+        return self.csrf is None or self.csrf == request.META.get('CSRF_COOKIE')
+
+    @classmethod
+    def create(cls, response, *args, **kwargs):
+        if response.streaming:
+            return None
+        if callable(getattr(response, 'render', None)):
+            response.render()
+        return cls(response, *args, **kwargs)
+
+
+class Codec:
+    encoding = None
+
+    def compress(self, data):
+        raise NotImplementedError()
+
+    def decompress(self, data):
+        raise NotImplementedError()
+
+
+class GzipCodec(Codec):
+    encoding = 'gzip'
+
+    def __init__(self, level=6):
+        self.level = level
+
+    def compress(self, data):
+        return gzip.compress(data, self.level, mtime=0)
+
+    def decompress(self, data):
+        return gzip.decompress(data)
+
+
+class CompressedResponseSnapshot(ResponseSnapshot):
+
+    def __init__(self, response, codec, private_headers=(), request=None):
+        super().__init__(response, private_headers, request)
+        self.etag = 'W/"%s"' % hashlib.md5(self.content, usedforsecurity=False).hexdigest()
+        self.encoding = codec.encoding
+        self.content = codec.compress(self.content)
+
+    def response(self, codec, compressed=True):
+        response = super().response()
+        if compressed:
+            response['Content-Encoding'] = self.encoding
+        else:
+            response.content = codec.decompress(self.content)
+        response['Content-Length'] = str(len(response.content))
+        response['ETag'] = self.etag
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+
+
+class SingleFlight:
+
+    class Call:
+
+        def __init__(self):
+            self.event = threading.Event()
+            self.result = None
+            self.failed = False
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+
+    def do(self, key, func, timeout=None):
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = SingleFlight.Call()
+
+        if leader:
+            try:
+                call.result = func()
+            except BaseException:
+                call.failed = True
+                raise
+            finally:
+                with self.lock:
+                    del self.calls[key]
+                call.event.set()
+            return call.result
+
+        # Waiters give up after `timeout` seconds, or if the leader failed,
+        # and compute their own result instead.
+        if call.event.wait(timeout) and not call.failed:
+            return call.result
+        return func()
+
+
+async def iterate_chunks_async(iterable, chunk_size):
+    # Every chunk is fetched in the sync thread, where the database cursor of a
+    # queryset iterator lives, instead of loading the whole iterable at once.
+    iterator = iter(iterable)
+    fetch = sync_to_async(lambda: list(itertools.islice(iterator, chunk_size)))
+    while chunk := await fetch():
+        yield chunk
+
+
+class AsyncSingleFlight:
+
+    def __init__(self):
+        self.calls = {}
+
+    async def do(self, key, func, timeout=None):
+        loop = asyncio.get_running_loop()
+        key = (loop, key)
+        future = self.calls.get(key)
+
+        if future is None:
+            future = self.calls[key] = loop.create_future()
+            result, failed = None, True
+            try:
+                result = await func()
+                failed = False
+            finally:
+                del self.calls[key]
+                future.set_result((result, failed))
+            return result
+
+        try:
+            result, failed = await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            failed = True
+        if failed:
+            return await func()
+        return result
+
+
+class ViewBound:
+    __slots__ = ('klass', 'name')
+
+    def __init__(self, klass):
+        self.klass = klass
+        self.name = None
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self.klass
+        bound = BoundToView(self.klass, instance)
+        instance.__dict__[self.name] = bound
+        return bound
+
+
+class BoundToView:
+    __slots__ = ('klass', 'view')
+
+    def __init__(self, klass, view):
+        self.klass = klass
+        self.view = view
+
+    def __call__(self, *args, **kwargs):
+        return self.klass(*args, view=self.view, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.klass, name)
+
+
 def collect_paths(module, app_name):
     from django_htmx_ui.views.generic import BaseTemplateView
     from django_htmx_ui.views.mixins import OriginTemplateMixin
@@ -193,9 +547,10 @@ def collect_paths(module, app_name):
     slug = getattr(module, 'SLUG', module.__name__.split('.')[-1])
     path_route = getattr(module, 'PATH_ROOT', slug + '/')
     includes = [
-        klass.path
+        klass_path
         for name, klass in members
-        if hasattr(klass, 'path')
+        if hasattr(klass, 'paths')
+        for klass_path in klass.paths
     ]
     paths = path(path_route, include((includes, app_name), namespace=slug))
     return paths
@@ -249,7 +604,7 @@ def merge(a, b, path=None, raise_conflicts=True):
     for key in b:
         if key in a:
             if isinstance(a[key], dict) and isinstance(b[key], dict):
-                merge(a[key], b[key], path + [str(key)])
+                merge(a[key], b[key], path + [str(key)], raise_conflicts)
             elif a[key] == b[key]:
                 pass  # same leaf value
             elif raise_conflicts:
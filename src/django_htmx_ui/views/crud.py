@@ -1,4 +1,14 @@
-from django_htmx_ui.utils import ContextProperty
+import csv
+import hashlib
+import json
+
+from django.core.cache import caches
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
+
+from django_htmx_ui.utils import ContextProperty, LazyCount, iterate_chunks_async
 from django_htmx_ui.views.mixins import ResponseNoContentMixin, FormMixin, InstanceMixin
 
 
@@ -8,14 +18,17 @@ class CrudMixin:
     def permission(self):
         return True
 
-    def on_get(self, *args, **kwargs):
+    def check_permission(self):
         if not self.permission:
             raise ValueError('Pemission error')
+        super().check_permission()
+
+    def on_get(self, *args, **kwargs):
+        self.check_permission()
         return super().on_get(*args, **kwargs)
 
     def on_post(self, *args, **kwargs):
-        if not self.permission:
-            raise ValueError('Pemission error')
+        self.check_permission()
         return super().on_post(*args, **kwargs)
 
 
@@ -25,6 +38,9 @@ class CrudCreateMixin(CrudMixin, FormMixin):
 
 class CrudRetrieveMixin(CrudMixin):
     filter = {}
+    search_backend = None
+    search_fields = ()
+    search_param = 'q'
 
     def filters_get(self):
         return {
@@ -33,13 +49,136 @@ class CrudRetrieveMixin(CrudMixin):
             if key.startswith('filter_')
         }
 
+    @property
+    def search_query(self):
+        return self.request.GET.get(self.search_param, '').strip()
+
+    @property
+    def queryset(self):
+        queryset = self.module.MODEL.objects.filter(**self.filter).filter(**self.filters_get())
+        if self.search_backend and self.search_query:
+            self.search_backend.register(self.module.MODEL, self.search_fields)
+            queryset = self.search_backend.search(queryset, self.search_query)
+        return queryset
+
     @ContextProperty
     def instances(self):
-        return self.module.MODEL.objects.filter(**self.filter).filter(**self.filters_get())
+        return self.queryset
+
+
+class EchoBuffer:
+
+    def write(self, value):
+        return value
 
 
 class CrudListMixin(CrudRetrieveMixin):
-    pass
+    export_param = 'export'
+    export_content_types = {
+        'csv': 'text/csv',
+        'jsonl': 'application/jsonl',
+    }
+    export_fields = None
+    export_chunk_size = 2000
+    count_strategy = 'exact'
+    count_cap = 1000
+    count_cache = 'default'
+    count_cache_timeout = 60
+    count_cached_strategy = 'exact'
+
+    @ContextProperty
+    def instances_count(self):
+        return LazyCount(getattr(self, f'count_{self.count_strategy}'))
+
+    def count_exact(self):
+        count = self.queryset.count()
+        return count, str(count), True
+
+    def count_capped(self):
+        count = self.queryset.values('pk')[:self.count_cap + 1].count()
+        if count > self.count_cap:
+            return self.count_cap, f'{self.count_cap}+', False
+        return count, str(count), True
+
+    def count_estimated(self):
+        queryset = self.queryset
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return self.count_capped()
+
+        sql, params = queryset.query.get_compiler(queryset.db).as_sql()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        count = plan[0]['Plan']['Plan Rows']
+        return count, f'~{count}', False
+
+    def count_cache_key(self):
+        # The compiled query covers whatever narrows the queryset, including the
+        # per user filters of an overwritten `queryset`.
+        queryset = self.queryset
+        sql, params = queryset.query.get_compiler(queryset.db).as_sql()
+        digest = hashlib.sha256(repr((
+            queryset.db,
+            sql,
+            params,
+            self.count_cached_strategy,
+        )).encode()).hexdigest()
+        return f'django_htmx_ui:count:{digest}'
+
+    def count_cached(self):
+        if self.count_cached_strategy == 'cached':
+            raise ValueError("The `count_cached_strategy` can't be 'cached'.")
+        return caches[self.count_cache].get_or_set(
+            self.count_cache_key(),
+            getattr(self, f'count_{self.count_cached_strategy}'),
+            self.count_cache_timeout,
+        )
+
+    @property
+    def export_format(self):
+        return self.request.GET.get(self.export_param)
+
+    def get_export_fields(self):
+        return self.export_fields or [field.attname for field in self.module.MODEL._meta.concrete_fields]
+
+    def export_rows(self, fields):
+        return self.queryset.values_list(*fields).iterator(chunk_size=self.export_chunk_size)
+
+    def export_csv(self, fields, rows):
+        writer = csv.writer(EchoBuffer())
+        yield writer.writerow(fields)
+        for row in rows:
+            yield writer.writerow(row)
+
+    def export_jsonl(self, fields, rows):
+        for row in rows:
+            yield json.dumps(dict(zip(fields, row)), cls=DjangoJSONEncoder) + '\n'
+
+    async def export_async(self, content):
+        async for chunk in iterate_chunks_async(content, self.export_chunk_size):
+            yield ''.join(chunk)
+
+    def export(self, export_format):
+        fields = self.get_export_fields()
+        content = getattr(self, f'export_{export_format}')(fields, self.export_rows(fields))
+        if isinstance(self.request, ASGIRequest):
+            # A sync iterator would be loaded whole under ASGI, before sending anything.
+            content = self.export_async(content)
+        response = StreamingHttpResponse(content, content_type=self.export_content_types[export_format])
+        response['Content-Disposition'] = f'attachment; filename="{self.slug_global}.{export_format}"'
+        return response
+
+    def on_get(self, request, *args, **kwargs):
+        ret = super().on_get(request, *args, **kwargs)
+        if ret:
+            return ret
+        elif self.export_format:
+            if self.export_format not in self.export_content_types:
+                return HttpResponseBadRequest(f"Export format '{self.export_format}' not found.")
+            return self.export(self.export_format)
 
 
 class CrudUpdateMixin(InstanceMixin, CrudMixin):
@@ -57,8 +196,10 @@ class CrudActionMixin(ResponseNoContentMixin, InstanceMixin, CrudMixin):
 class CrudDeleteMixin(CrudActionMixin):
 
     def on_post(self, request, *args, **kwargs):
+        pk = self.instance.pk
         count, deleted = self.instance.delete()
         if count:
+            self.on_model_changed(self.instance, pk)
             self.on_post_success_message(request, *args, **kwargs)
             return self.on_post_success(request, *args, **kwargs)
         else:
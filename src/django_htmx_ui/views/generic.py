@@ -1,28 +1,35 @@
 import importlib
-import inspect
 import os
+from collections import ChainMap
 
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.http import HttpResponse
+from django.http import HttpResponse, HttpResponseForbidden, StreamingHttpResponse
 from django.shortcuts import redirect
 from django.template import engines
 from django.urls import re_path
-from django.views.generic import TemplateView, RedirectView
+from django.views.generic import TemplateView, RedirectView, View
 from django.utils.cache import patch_vary_headers
+from django.utils.translation import get_language
 from django_htmx.http import HttpResponseLocation, trigger_client_event, HttpResponseClientRedirect
 
-from django_htmx_ui.utils import ContextProperty, ContextCachedProperty, merge, to_snake_case, UrlView, Location
+from django_htmx_ui.sse import broker
+from django_htmx_ui.utils import ContextProperty, ContextProperties, LayeredTemplateResponse, merge, to_snake_case, UrlView, Location
 from django_htmx_ui.views.mixins import OriginTemplateMixin
 
 
 class BaseTemplateView(TemplateView):
     response = None
     vary_headers = ("Hx-Request",)
+    context_raise_conflicts = None
+    response_class = LayeredTemplateResponse
 
     def setup(self, request, *args, **kwargs):
         self.headers = {}
         self.triggers = []
+        self._context = {}
         self.request = request
         self.location_bar = Location.create_from_url(self.bar_url())
         self.location_req = Location.create_from_url(request.get_full_path())
@@ -41,6 +48,9 @@ class BaseTemplateView(TemplateView):
     def on_get(self, request, *args, **kwargs):
         pass
 
+    def check_permission(self):
+        pass
+
     def post(self, request, *args, **kwargs):
         ret = self.on_post(request, *args, **kwargs)
         if ret:
@@ -91,24 +101,18 @@ class BaseTemplateView(TemplateView):
         self.triggers.append((args, kwargs))
 
     def decorators_context(self):
-        return {
-            name: getattr(self, name)
-            for name, method in inspect.getmembers_static(
-                self.__class__,
-                lambda o:
-                    isinstance(o, (
-                        ContextProperty,
-                        ContextCachedProperty,
-                    ))
-            )
-        }
+        return ContextProperties(self)
 
     def get_context_data(self, **kwargs):
-        return {
-            **super().get_context_data(**kwargs),
-            **self.decorators_context(),
-            **getattr(self, '_context', {}),
-        }
+        # Layers are looked up in order, so the first one wins. The leading
+        # empty layer takes the template engine's own additions (csrf, context
+        # processors) without touching the view's state.
+        return ChainMap(
+            {},
+            self._context,
+            self.decorators_context(),
+            super().get_context_data(**kwargs),
+        )
 
     def get_template_names(self):
         if not self.request.htmx or self.request.htmx.history_restore_request:
@@ -116,8 +120,32 @@ class BaseTemplateView(TemplateView):
         else:
             return super().get_template_names()
 
+    @property
+    def cache_scope(self):
+        # Rendered pages may embed the user's data, so by default they are only
+        # shared between requests of the same user.
+        user = getattr(self.request, 'user', None)
+        return user.pk if user is not None and user.is_authenticated else None
+
+    def variant_key(self):
+        return (
+            self.__class__.__module__,
+            self.__class__.__qualname__,
+            self.request.method,
+            str(self.location_req),
+            str(self.location_bar),
+            bool(self.request.htmx),
+            self.request.htmx.history_restore_request,
+            self.request.headers.get('HX-Target'),
+            get_language(),
+            self.cache_scope,
+        )
+
     def add_context(self, key, value):
-        setattr(self, '_context', merge(getattr(self, '_context', {}), {key: value}))
+        raise_conflicts = self.context_raise_conflicts
+        if raise_conflicts is None:
+            raise_conflicts = settings.DEBUG
+        merge(self._context, {key: value}, raise_conflicts=raise_conflicts)
 
     @classmethod
     @property
@@ -155,6 +183,11 @@ class BaseTemplateView(TemplateView):
     def path(cls):
         return re_path(rf'^{cls.path_route}$', cls.as_view(), name=cls.slug)
 
+    @classmethod
+    @property
+    def paths(cls):
+        return [cls.path]
+
     def redirect(self, url):
         if self.request.htmx:
             return HttpResponseClientRedirect(url)
@@ -237,3 +270,35 @@ class PrivateTemplateView(LoginRequiredMixin, PublicTemplateView):
     @ContextProperty
     def user(self):
         return self.request.user
+
+
+class EventStreamView(View):
+    broker = broker
+    heartbeat = 15
+    login_required = True
+    allowed_events = None
+
+    def get_events(self, request):
+        return [event for event in request.GET.get('events', '').split(',') if event]
+
+    def has_permission(self, request, events):
+        # Runs in a sync thread, so it may query the session and the database.
+        if self.login_required and not request.user.is_authenticated:
+            return False
+        return all(self.has_event_permission(request, event) for event in events)
+
+    def has_event_permission(self, request, event):
+        return self.allowed_events is None or event in self.allowed_events
+
+    async def get(self, request, *args, **kwargs):
+        events = self.get_events(request)
+        if not await sync_to_async(self.has_permission)(request, events):
+            return HttpResponseForbidden()
+        return StreamingHttpResponse(
+            self.broker.stream(events, self.heartbeat),
+            content_type='text/event-stream',
+            headers={
+                'Cache-Control': 'no-cache',
+                'X-Accel-Buffering': 'no',
+            },
+        )
@@ -1,8 +1,29 @@
-from django.core.exceptions import ViewDoesNotExist
+import functools
+import hashlib
+import inspect
+import time
+
+from asgiref.sync import sync_to_async
+from django.core.cache import caches
+from django.core.exceptions import ValidationError, ViewDoesNotExist
+from django.db import transaction
+from django.db.models import Model
+from django.dispatch import receiver
+from django.forms import FileField
+from django.forms.utils import ErrorDict
+from django.http import HttpResponse, HttpResponseBadRequest, HttpResponseNotModified
 from django.shortcuts import redirect
+from django.template.loader import get_template
+from django.urls import Resolver404, re_path, reverse
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
 from django.utils.text import slugify
 
-from django_htmx_ui.utils import ContextProperty, ContextCachedProperty, UrlView, to_snake_case
+from django_htmx_ui.signals import model_changed
+from django_htmx_ui.sse import broker, model_event, EventStream
+from django_htmx_ui.utils import ContextProperty, ContextCachedProperty, UrlView, to_snake_case, \
+    ResponseSnapshot, SingleFlight, AsyncSingleFlight, ContextDeferredProperty, ContextProperties, Url, ViewBound, \
+    CompressedResponseSnapshot, GzipCodec, render_template, csrf_secret
 
 
 class OriginTemplateMixin:
@@ -31,6 +52,10 @@ class PartialTemplateMixin:
 
 class FormMixin:
     form_initial = {}
+    event_broker = broker
+    form_validate_param = '_validate'
+    form_validate_dependencies = {}
+    form_validate_full_clean = False
 
     @property
     def form_instance(self):
@@ -51,9 +76,70 @@ class FormMixin:
                 else:
                     return Form(self.request.POST, self.request.FILES)
 
+    @property
+    def form_validate_requested(self):
+        return self.form_validate_param in self.request.POST
+
+    @property
+    def form_validate_field(self):
+        if self.form_validate_requested:
+            return self.request.POST[self.form_validate_param] or self.request.htmx.trigger_name
+
+    def form_validate(self, name):
+        Form = self.__class__.Form
+        names = [*self.form_validate_dependencies.get(name, ()), name]
+        files = self.request.FILES if any(isinstance(Form.base_fields.get(n), FileField) for n in names) else None
+        if self.form_instance:
+            form = Form(self.request.POST, files, instance=self.form_instance)
+        else:
+            form = Form(self.request.POST, files)
+
+        if name not in form.fields:
+            return None
+
+        if self.form_validate_full_clean:
+            form.full_clean()
+        else:
+            form.cleaned_data = {}
+            form._errors = ErrorDict(renderer=form.renderer)
+            for n in names:
+                self.form_validate_clean_field(form, n)
+        return form
+
+    def form_validate_clean_field(self, form, name):
+        bf = form[name]
+        field = bf.field
+        value = bf.initial if field.disabled else bf.data
+        try:
+            if isinstance(field, FileField):
+                form.cleaned_data[name] = field.clean(value, bf.initial)
+            else:
+                form.cleaned_data[name] = field.clean(value)
+            if hasattr(form, f'clean_{name}'):
+                form.cleaned_data[name] = getattr(form, f'clean_{name}')()
+        except ValidationError as e:
+            form.add_error(name, e)
+
+    def form_validate_response(self, form, name):
+        if self.form_validate_full_clean:
+            # The cross-field `clean()` errors belong to no field.
+            return HttpResponse(str(form.non_field_errors()) + str(form[name].errors))
+        return HttpResponse(str(form[name].errors))
+
     def on_post(self, request, *args, **kwargs):
+        if self.form_validate_requested:
+            # A validation request never saves, even if its field is unknown.
+            name = self.form_validate_field
+            if not name:
+                return HttpResponseBadRequest('Missing field name.')
+            form = self.form_validate(name)
+            if form is None:
+                return HttpResponseBadRequest(f"Field '{name}' not found.")
+            return self.form_validate_response(form, name)
+
         if self.form.is_valid():
-            self.form.save()
+            instance = self.form.save()
+            self.on_model_changed(instance)
             self.on_post_success_message(request, *args, **kwargs)
             return self.on_post_success(request, *args, **kwargs)
         else:
@@ -63,6 +149,21 @@ class FormMixin:
     def on_post_success(self, request, *args, **kwargs):
         pass
 
+    def on_model_changed(self, instance, pk=None):
+        if isinstance(instance, Model):
+            pk = instance.pk if pk is None else pk
+            # Listeners re-fetch the data, so they are only told after the commit,
+            # and never about a change that was rolled back.
+            transaction.on_commit(
+                functools.partial(self.on_model_committed, instance.__class__, pk),
+                using=instance._state.db,
+            )
+
+    def on_model_committed(self, model, pk):
+        self.event_broker.publish(model_event(model))
+        self.event_broker.publish(model_event(model, pk))
+        model_changed.send(sender=model, pk=pk)
+
     def on_post_success_message(self, request, *args, **kwargs):
         self.message_success('Saved!')
 
@@ -118,27 +219,342 @@ class ResponseNoContentMixin:
         return super().post(request, *args, **kwargs)
 
 
+class DeferredMixin:
+    deferred_section = None
+    deferred_context = ('url',)
+
+    @classmethod
+    @property
+    def deferred_sections(cls):
+        return [
+            name
+            for name, member in inspect.getmembers_static(cls, lambda o: isinstance(o, ContextDeferredProperty))
+        ]
+
+    @classmethod
+    @property
+    def paths(cls):
+        # The sections go first, as a route ending with an optional group (e.g. tabs)
+        # would also match them.
+        return [
+            re_path(
+                rf'^{cls.path_route}_{name}/$',
+                cls.as_view(deferred_section=name),
+                name=f'{cls.slug}__{name}',
+            )
+            for name in cls.deferred_sections
+        ] + super().paths
+
+    def deferred_url(self, name):
+        match = self.request.resolver_match
+        path = reverse(f'{match.namespace}:{self.slug}__{name}', kwargs=match.kwargs)
+        return str(Url(path, list(self.location_req.query.query_list)))
+
+    def deferred_template_name(self, name):
+        return self.templates_dir + f'{self.slug}__{name}.html'
+
+    def decorators_context(self):
+        if self.deferred_section:
+            return ContextProperties(self, (self.deferred_section, *self.deferred_context))
+        return super().decorators_context()
+
+    def get_template_names(self):
+        if self.deferred_section:
+            return [self.deferred_template_name(self.deferred_section)]
+        return super().get_template_names()
+
+    def apply_location(self, response):
+        if self.deferred_section:
+            return response
+        return super().apply_location(response)
+
+
+class EventStreamMixin:
+    sse_url = None
+
+    @property
+    def sse_events(self):
+        model = getattr(self.module, 'MODEL', None)
+        return (model_event(model),) if model else ()
+
+    @ContextProperty
+    def sse(self):
+        return EventStream(self.sse_events, self.sse_url)
+
+
+class CoalesceMixin:
+    coalesce_flight = SingleFlight()
+    coalesce_async_flight = AsyncSingleFlight()
+    coalesce_timeout = 5
+    coalesce_async = False
+    coalesce_private_headers = ()
+
+    @property
+    def coalesce_enabled(self):
+        return (
+            self.request.method == 'GET' and
+            bool(self.request.htmx) and
+            not self.request.htmx.history_restore_request and
+            not getattr(self.request, '_coalesced', False)
+        )
+
+    def coalesce_key(self):
+        return self.variant_key()
+
+    def get(self, request, *args, **kwargs):
+        snapshot = getattr(request, '_coalesced_snapshot', None)
+        if snapshot is not None:
+            # A waiter of the async flight, served after `dispatch` ran its checks.
+            self.check_permission()
+            return snapshot.response()
+
+        if not self.coalesce_enabled:
+            return super().get(request, *args, **kwargs)
+
+        # The waiters skip `on_get`, so the permission is checked before joining.
+        self.check_permission()
+        leader = None
+
+        def compute():
+            nonlocal leader
+            leader = super(CoalesceMixin, self).get(request, *args, **kwargs)
+            if leader.status_code == 200:
+                return ResponseSnapshot.create(leader, self.coalesce_private_headers, request=request)
+
+        snapshot = self.coalesce_flight.do(self.coalesce_key(), compute, self.coalesce_timeout)
+        if leader is not None:
+            return leader
+        elif snapshot is None or not snapshot.shareable(request):
+            return super().get(request, *args, **kwargs)
+        else:
+            return snapshot.response()
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        if not cls.coalesce_async:
+            return view
+
+        @sync_to_async
+        def coalesce_key(request, *args, **kwargs):
+            self = cls(**initkwargs)
+            self.setup(request, *args, **kwargs)
+            if self.coalesce_enabled:
+                return self.coalesce_key()
+
+        @sync_to_async
+        def render(request, *args, **kwargs):
+            # The waiters stay on the event loop, so the sync view must not
+            # coalesce again inside the worker thread.
+            request._coalesced = True
+            response = view(request, *args, **kwargs)
+            # Only a successful response is shared, not e.g. the leader's redirect to the login.
+            if response.status_code != 200:
+                return response, None
+            return response, ResponseSnapshot.create(response, cls.coalesce_private_headers, request=request)
+
+        @sync_to_async
+        def serve(request, snapshot, *args, **kwargs):
+            # The copy goes through the whole view, so `dispatch` (e.g. the login
+            # check) and `check_permission` run for every waiter.
+            request._coalesced = True
+            request._coalesced_snapshot = snapshot
+            return view(request, *args, **kwargs)
+
+        async def coalesced_view(request, *args, **kwargs):
+            key = await coalesce_key(request, *args, **kwargs)
+            if key is None:
+                response, snapshot = await render(request, *args, **kwargs)
+                return response
+
+            leader = None
+
+            async def compute():
+                nonlocal leader
+                leader, snapshot = await render(request, *args, **kwargs)
+                return snapshot
+
+            snapshot = await cls.coalesce_async_flight.do(key, compute, cls.coalesce_timeout)
+            if leader is not None:
+                return leader
+            elif snapshot is None or not snapshot.shareable(request):
+                response, snapshot = await render(request, *args, **kwargs)
+                return response
+            else:
+                return await serve(request, snapshot, *args, **kwargs)
+
+        functools.update_wrapper(coalesced_view, view, assigned=('__module__', '__doc__'), updated=('__dict__',))
+        return coalesced_view
+
+
+class HistorySnapshotMixin:
+    history_snapshot_save_on_push = False
+    history_snapshot_cache = 'default'
+    history_snapshot_timeout = 60
+
+    def history_snapshot_key(self, url):
+        digest = hashlib.sha256(repr((self.cache_scope, str(url))).encode()).hexdigest()
+        return f'django_htmx_ui:history:{digest}'
+
+    @property
+    def history_snapshot_restorable(self):
+        try:
+            return self.location_bar.view is self.__class__
+        except Resolver404:
+            return False
+
+    def history_snapshot_save(self, url):
+        template = get_template(self.template_origin)
+        content = render_template(template, self.get_context_data(**self.kwargs), self.request)
+        caches[self.history_snapshot_cache].set(
+            self.history_snapshot_key(url), (content, csrf_secret(self.request)), self.history_snapshot_timeout,
+        )
+
+    def get(self, request, *args, **kwargs):
+        if request.htmx.history_restore_request:
+            # The snapshot skips `on_get`, so the permission is checked here.
+            self.check_permission()
+            snapshot = caches[self.history_snapshot_cache].get(self.history_snapshot_key(self.location_req))
+            if snapshot is not None:
+                content, csrf = snapshot
+                if csrf is None or csrf == request.META.get('CSRF_COOKIE'):
+                    return self.response_prepare(HttpResponse(content))
+        return super().get(request, *args, **kwargs)
+
+    def apply_location(self, response):
+        response = super().apply_location(response)
+        if (
+            self.history_snapshot_save_on_push and
+            response.status_code == 200 and
+            response.has_header('HX-Push-Url') and
+            not getattr(self, '_history_snapshot_saved', False) and
+            self.history_snapshot_restorable
+        ):
+            self._history_snapshot_saved = True
+            self.history_snapshot_save(response['HX-Push-Url'])
+        return response
+
+
+class FragmentCacheMixin:
+    fragment_cache = 'default'
+    fragment_cache_timeout = 60
+    fragment_codec = GzipCodec()
+    fragment_private_headers = ()
+    fragment_version_cache = 'default'
+
+    @property
+    def fragment_cache_enabled(self):
+        return (
+            self.request.method == 'GET' and
+            bool(self.request.htmx) and
+            not self.request.htmx.history_restore_request
+        )
+
+    @property
+    def fragment_models(self):
+        model = getattr(self.module, 'MODEL', None)
+        return (model,) if model else ()
+
+    @staticmethod
+    def fragment_version_key(model):
+        return f'django_htmx_ui:fragment:version:{model._meta.label_lower}'
+
+    @classmethod
+    def fragment_version(cls, model):
+        # A missing version starts from the current time, so it never repeats an
+        # earlier one, even after the cache evicted it.
+        cache = caches[FragmentCacheMixin.fragment_version_cache]
+        return cache.get_or_set(cls.fragment_version_key(model), time.time_ns, None)
+
+    @classmethod
+    def fragment_invalidate(cls, model):
+        cache = caches[FragmentCacheMixin.fragment_version_cache]
+        try:
+            cache.incr(cls.fragment_version_key(model))
+        except ValueError:
+            cache.set(cls.fragment_version_key(model), time.time_ns(), None)
+
+    def fragment_cache_key(self):
+        versions = [self.fragment_version(model) for model in self.fragment_models]
+        digest = hashlib.sha256(repr((self.variant_key(), versions)).encode()).hexdigest()
+        return f'django_htmx_ui:fragment:{digest}'
+
+    @property
+    def fragment_accepts_encoding(self):
+        for coding in self.request.headers.get('Accept-Encoding', '').split(','):
+            name, _, params = coding.partition(';')
+            if name.strip() == self.fragment_codec.encoding:
+                return params.replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000')
+        return False
+
+    def get(self, request, *args, **kwargs):
+        if not self.fragment_cache_enabled:
+            return super().get(request, *args, **kwargs)
+
+        # A cached response skips `on_get`, so the permission is checked here.
+        self.check_permission()
+        cache = caches[self.fragment_cache]
+        key = self.fragment_cache_key()
+        snapshot = cache.get(key)
+        original = None
+        if snapshot is None or not snapshot.shareable(request):
+            original = super().get(request, *args, **kwargs)
+            snapshot = CompressedResponseSnapshot.create(
+                original, self.fragment_codec, self.fragment_private_headers, request=request,
+            )
+            if snapshot is None or snapshot.status_code != 200:
+                return original
+            cache.set(key, snapshot, self.fragment_cache_timeout)
+
+        response = self.fragment_response(snapshot)
+        if original is not None:
+            # The response is rebuilt from the snapshot, which lacks what is private.
+            response.cookies.update(original.cookies)
+            for header in self.fragment_private_headers:
+                if original.has_header(header):
+                    response[header] = original[header]
+        return response
+
+    def fragment_response(self, snapshot):
+        etags = [etag.removeprefix('W/') for etag in parse_etags(self.request.headers.get('If-None-Match', ''))]
+        if snapshot.etag.removeprefix('W/') in etags or '*' in etags:
+            response = HttpResponseNotModified()
+            response['ETag'] = snapshot.etag
+            patch_vary_headers(response, ('Accept-Encoding',))
+            return response
+        return snapshot.response(self.fragment_codec, compressed=self.fragment_accepts_encoding)
+
+
+@receiver(model_changed)
+def fragment_model_changed(sender, **kwargs):
+    FragmentCacheMixin.fragment_invalidate(sender)
+
+
 class TabsMixin:
 
+    @ViewBound
     class Tabs:
+        __slots__ = ('links', 'selected', 'remember', 'view')
 
         class Link:
-            index = None
+            __slots__ = ('title', 'url', '_slug', 'icon', 'index')
 
             def __init__(self, title, url, slug=None, icon=None):
                 self.title = title
                 self.url = url
                 self._slug = slug
                 self.icon = icon
+                self.index = None
 
             @property
             def slug(self):
                 return self._slug or str(self.index)
 
-        def __init__(self, *links, selected=0, remember=False, titles_slugify=True):
+        def __init__(self, *links, selected=0, remember=False, titles_slugify=True, view=None):
             self.selected = selected
             self.remember = remember
             self.links = links
+            self.view = view
 
             for i, l in enumerate(self.links):
                 l.index = i
@@ -151,12 +567,6 @@ class TabsMixin:
         def active(self):
             return self.links[self.selected]
 
-    def __init__(self, *args, **kwargs):
-        class TabsView(TabsMixin.Tabs):
-            view = self
-        self.Tabs = TabsView
-        super().__init__(*args, **kwargs)
-
     @ContextProperty
     def tabs(self):
         raise NotImplementedError()
@@ -228,15 +638,12 @@ class TabsMixin:
 
 class ModalMixin:
 
+    @ViewBound
     class Modal:
+        __slots__ = ('url', 'id', 'view')
 
-        def __init__(self, url, _id=None):
+        def __init__(self, url, _id=None, view=None):
             self.url = url
-            self.id = _id or f'modal_{self.view.slug_global}'
-
-    def __init__(self, *args, **kwargs):
-        class ModalView(ModalMixin.Modal):
-            view = self
-        self.Modal = ModalView
-        super().__init__(*args, **kwargs)
+            self.view = view
+            self.id = _id or f'modal_{view.slug_global}'
 